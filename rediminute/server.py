@@ -7,54 +7,347 @@ and echoes back messages to clients.
 import asyncio
 import logging
 import signal
-import time
+import socket
 from contextlib import suppress as contextlib_suppress
-from dataclasses import dataclass, field
-from enum import Enum
-from typing import Dict
+from typing import Optional, Set, cast
 
 # Default server configuration
 DEFAULT_HOST = "0.0.0.0"  # Listen on all interfaces
 DEFAULT_PORT = 8379       # Default server port
 DEFAULT_TIMEOUT = 300     # Default idle timeout in seconds
-CLEANUP_INTERVAL = 60     # Interval for checking stale connections
+DEFAULT_WORKERS = 1       # Default number of server processes
+RECEIVE_BUFFER_SIZE = 64 * 1024  # Per-connection buffer, also the max line length
+LISTEN_BACKLOG = 4096     # Pending connections queue (capped by the kernel)
+FASTOPEN_QUEUE_SIZE = 128  # Pending TCP Fast Open requests
+CLOCK_RESOLUTION = 0.1    # Seconds between updates of the cached clock
+WRITE_BUFFER_HIGH_WATER = 1024 * 1024  # Pause reading above this many unsent bytes
+WRITE_BUFFER_LOW_WATER = 256 * 1024    # Resume reading below this many
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger("rediminute.server")
 
 
-class ConnectionState(Enum):
-    """Connection states for client connections."""
-    CONNECTED = "connected"
-    DISCONNECTED = "disconnected"
+def configure_logging(debug: bool = False) -> None:
+    """
+    Configure logging for running the server as an application.
+
+    This is deliberately not done at import time, so that importing
+    the server as a library doesn't install handlers on the root logger.
+
+    Args:
+        debug: Whether to enable debug logging for rediminute loggers
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    if debug:
+        logging.getLogger("rediminute").setLevel(logging.DEBUG)
+
+
+def configure_listening_socket(sock: socket.socket) -> None:
+    """
+    Enable TCP Fast Open on a listening socket, where supported.
+
+    Fast Open lets reconnecting clients send their first request in the
+    SYN, saving a round trip. It is a no-op unless the kernel allows it
+    for servers (net.ipv4.tcp_fastopen on Linux), and platforms without
+    it are silently skipped since it is only an optimization.
+
+    Args:
+        sock: A listening server socket
+    """
+    fastopen = getattr(socket, "TCP_FASTOPEN", None)
+    if fastopen is None or sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return
+    with contextlib_suppress(OSError):
+        sock.setsockopt(socket.IPPROTO_TCP, fastopen, FASTOPEN_QUEUE_SIZE)
+
+
+def configure_client_socket(sock: socket.socket) -> None:
+    """
+    Tune an accepted client socket for small request/response messages.
+
+    TCP_NODELAY disables Nagle's algorithm so short replies are sent
+    right away instead of waiting on the peer's delayed ACK. asyncio and
+    uvloop already set it on TCP transports, but we don't rely on the
+    event loop for it. SO_KEEPALIVE lets the kernel detect peers that
+    vanished without closing the connection.
+
+    Send/receive buffer sizes are deliberately left alone: setting them
+    turns off the kernel's buffer autotuning.
+
+    Args:
+        sock: The connected client socket
+    """
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
 
 
-@dataclass
-class ClientConnection:
+class CoarseClock:
     """
-    Client connection information.
+    Event loop clock that is read once per tick instead of on every use.
 
-    Note: This is intentionally not frozen to allow state updates,
-    but we treat it as immutable for most operations.
+    Connections record the time of every read for their idle timeout.
+    Reading a cached attribute is cheaper than calling loop.time() each
+    time, and being up to CLOCK_RESOLUTION behind doesn't matter for a
+    timeout measured in seconds.
     """
-    writer: asyncio.StreamWriter
-    address: tuple
-    connected_at: float = field(default_factory=lambda: time.time())
-    last_active_at: float = field(default_factory=lambda: time.time())
-    state: ConnectionState = ConnectionState.CONNECTED
 
-    def update_activity(self) -> None:
-        """Update the last activity timestamp."""
-        self.last_active_at = time.time()
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Initialize the clock with the current loop time.
+
+        Args:
+            loop: Event loop whose time() the clock caches
+        """
+        self._loop = loop
+        self.now = loop.time()
+
+    async def run(self) -> None:
+        """Keep `now` up to date until cancelled."""
+        while True:
+            await asyncio.sleep(CLOCK_RESOLUTION)
+            self.now = self._loop.time()
+
+
+class EchoProtocol(asyncio.BufferedProtocol):
+    """
+    Protocol for a single client connection that echoes back every line.
+
+    The event loop reads straight into a buffer preallocated once per
+    connection, and complete lines are located with bytearray.find, which
+    scans in C. This avoids the per-line allocations and Python-level
+    buffer handling of StreamReader.readline().
+
+    Lines are echoed back verbatim. Lines longer than RECEIVE_BUFFER_SIZE
+    close the connection, just like readline() refuses lines over the
+    StreamReader limit.
+
+    One instance exists per connection, so it uses __slots__ to avoid
+    carrying a per-instance __dict__.
+    """
+
+    __slots__ = (
+        "_connections",
+        "_idle_timeout",
+        "_clock",
+        "_buffer",
+        "_buffer_view",
+        "_buffered",
+        "_transport",
+        "_address",
+        "_loop",
+        "_last_active_at",
+        "_idle_timer",
+        "_closed",
+    )
+
+    def __init__(self, connections: "Set[EchoProtocol]", idle_timeout: int,
+                 clock: CoarseClock) -> None:
+        """
+        Initialize the protocol for a new connection.
+
+        Args:
+            connections: Live connections of the server; the protocol adds
+                itself when connected and removes itself when closed
+            idle_timeout: Seconds before closing an idle connection
+            clock: Server clock used to track the last activity
+        """
+        self._connections = connections
+        self._idle_timeout = idle_timeout
+        self._clock = clock
+        self._buffer = bytearray(RECEIVE_BUFFER_SIZE)
+        self._buffer_view = memoryview(self._buffer)
+        self._buffered = 0  # Bytes in the buffer not yet part of a full line
+        self._transport: Optional[asyncio.Transport] = None
+        self._address = None  # Type: Optional[tuple]
+        self._loop = asyncio.get_running_loop()
+        self._last_active_at = clock.now
+        self._idle_timer = None  # Type: Optional[asyncio.TimerHandle]
+        self._closed = self._loop.create_future()
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """
+        Register the connection and start its idle timer.
+
+        Args:
+            transport: Transport for the new client connection
+        """
+        # Connections from create_server() are always stream transports;
+        # cast rather than check, as uvloop's don't subclass asyncio.Transport
+        self._transport = cast(asyncio.Transport, transport)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("New connection from %s", self.address)
+
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            configure_client_socket(sock)
+        # Larger than the default 64 KiB, so bursts of echoes don't bounce
+        # the connection between paused and resumed reading
+        self._transport.set_write_buffer_limits(
+            high=WRITE_BUFFER_HIGH_WATER, low=WRITE_BUFFER_LOW_WATER
+        )
+
+        self._connections.add(self)
+        self._idle_timer = self._loop.call_later(
+            self._idle_timeout, self._check_idle
+        )
+
+    def get_buffer(self, sizehint: int) -> memoryview:  # noqa: ARG002 - base signature
+        """
+        Return the free part of the receive buffer for the loop to fill.
+
+        Args:
+            sizehint: Minimum size hint from the event loop (unused, the
+                whole free space is always offered)
+
+        Returns:
+            A writable view of the unused tail of the receive buffer
+        """
+        return self._buffer_view[self._buffered:]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """
+        Echo back every complete line that has been received.
+
+        Lines are never split apart: everything up to the last newline is
+        sent back with a single write, however many lines a read brought
+        in. Any incomplete trailing line is moved to the start of the
+        buffer to be completed by later reads.
+
+        Args:
+            nbytes: Number of bytes the loop wrote into the buffer
+        """
+        self._last_active_at = self._clock.now
+
+        buffer = self._buffer
+        end = self._buffered + nbytes
+        # Only the new bytes need scanning, the kept tail has no newline
+        last_newline = buffer.rfind(b"\n", self._buffered, end)
+
+        if last_newline == -1:
+            if end == len(buffer):
+                logger.error(
+                    "Line too long from %s, closing connection", self.address
+                )
+                self.close()
+            else:
+                self._buffered = end
+            return
+
+        lines_end = last_newline + 1
+        self._echo(buffer[:lines_end])
+
+        # Same-size slice assignment moves the bytes in place
+        buffer[:end - lines_end] = buffer[lines_end:end]
+        self._buffered = end - lines_end
+
+    def eof_received(self) -> bool:
+        """
+        Echo back a final line that wasn't newline terminated.
+
+        Returns:
+            False, so the transport closes itself
+        """
+        if self._buffered:
+            self._echo(self._buffer[:self._buffered] + b"\n")
+            self._buffered = 0
+        return False
+
+    def pause_writing(self) -> None:
+        """Stop reading while the client isn't consuming our responses."""
+        if self._transport:
+            self._transport.pause_reading()
+
+    def resume_writing(self) -> None:
+        """Resume reading once the write buffer has drained."""
+        if self._transport:
+            self._transport.resume_reading()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """
+        Unregister the connection and release its timer.
+
+        Args:
+            exc: The error that closed the connection, or None on a
+                regular close or EOF
+        """
+        if self._idle_timer:
+            self._idle_timer.cancel()
+        self._connections.discard(self)
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+        if logger.isEnabledFor(logging.INFO):
+            if exc is not None:
+                logger.info("Connection error for %s: %s", self.address, exc)
+            logger.info("Connection from %s closed", self.address)
 
     @property
-    def idle_time(self) -> float:
-        """Get the time in seconds since the last activity."""
-        return time.time() - self.last_active_at
+    def address(self) -> Optional[tuple]:
+        """
+        Address of the connected peer, or None if it is not known.
+
+        It is only needed for logging, so it is looked up on first use:
+        some event loops (uvloop) call getpeername() for every lookup.
+        Callers on hot paths should check the log level before using it.
+        """
+        if self._address is None and self._transport:
+            self._address = self._transport.get_extra_info('peername')
+        return self._address
+
+    def close(self) -> None:
+        """Close the connection after flushing any pending responses."""
+        if self._transport and not self._transport.is_closing():
+            self._transport.close()
+
+    async def wait_closed(self) -> None:
+        """Wait until the connection has been fully closed."""
+        await self._closed
+
+    def _echo(self, lines: bytearray) -> None:
+        """
+        Send received lines back to the client, byte for byte.
+
+        Lines are split and stripped as bytes, and only decoded for the
+        log record when debug logging is enabled, so the echo itself never
+        pays for (or fails on) UTF-8 decoding.
+
+        Args:
+            lines: One or more received lines, each with its trailing
+                newline. This must be a copy rather than a view of the
+                receive buffer: transports may keep a reference to unsent
+                data, and the buffer is reused by the next read.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            for line in lines.split(b"\n")[:-1]:
+                message = line.rstrip(b"\r")
+                logger.debug(
+                    "Received: %s from %s",
+                    message.decode(errors="replace"),
+                    self.address,
+                )
+
+        if self._transport:
+            self._transport.write(lines)
+
+    def _check_idle(self) -> None:
+        """
+        Close the connection if it has been idle for too long.
+
+        Reads only record their time, rather than cancelling and creating
+        a timer each; when the timer fires it is re-armed for whatever is
+        left of the timeout since the last read.
+        """
+        idle_time = self._clock.now - self._last_active_at
+        if idle_time >= self._idle_timeout:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Client %s idle timeout", self.address)
+            self.close()
+        else:
+            self._idle_timer = self._loop.call_later(
+                self._idle_timeout - idle_time, self._check_idle
+            )
 
 
 class RediminuteServer:
@@ -72,7 +365,8 @@ class RediminuteServer:
     """
 
     def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
-                 idle_timeout: int = DEFAULT_TIMEOUT) -> None:
+                 idle_timeout: int = DEFAULT_TIMEOUT,
+                 reuse_port: bool = False) -> None:
         """
         Initialize the server with configuration parameters.
 
@@ -80,230 +374,139 @@ class RediminuteServer:
             host: Host address to bind to
             port: Port to listen on
             idle_timeout: Seconds before closing an idle connection
+            reuse_port: Whether to bind with SO_REUSEPORT, so that several
+                server processes can listen on the same port. Connection
+                state is then per process.
         """
         self.host = host
         self.port = port
         self.idle_timeout = idle_timeout
+        self.reuse_port = reuse_port
         self.server = None  # Type: Optional[asyncio.Server]
-        self.clients: Dict[asyncio.StreamWriter, ClientConnection] = {}
+        self._connections: Set[EchoProtocol] = set()
         self.is_running = False
-        self.cleanup_task = None  # Type: Optional[asyncio.Task]
+        self._clock = None  # Type: Optional[CoarseClock]
+        self._clock_task = None  # Type: Optional[asyncio.Task]
+        self._shutdown_requested = None  # Type: Optional[asyncio.Event]
+        self._stopped = None  # Type: Optional[asyncio.Event]
 
     async def start(self) -> None:
         """
         Start the server and listen for connections.
 
-        This is a blocking call that runs until the server is shutdown.
+        This is a blocking call that runs until the server is shutdown,
+        either by a SIGINT/SIGTERM or by a call to stop().
 
         Raises:
             OSError: If the server cannot bind to the specified host and port
         """
         self.is_running = True
+        self._shutdown_requested = asyncio.Event()
+        self._stopped = asyncio.Event()
 
-        # Create the server
-        self.server = await asyncio.start_server(
-            self._handle_client,
-            self.host,
-            self.port
-        )
-
-        # Set up signal handlers for graceful shutdown
         loop = asyncio.get_running_loop()
-        for sig in (signal.SIGINT, signal.SIGTERM):
-            loop.add_signal_handler(sig, lambda: asyncio.create_task(self.stop()))
 
-        # Start periodic cleanup task
-        self.cleanup_task = asyncio.create_task(self._periodic_cleanup())
-
-        logger.info(f"Server started on {self.host}:{self.port}")
-
-        # Start serving
-        if self.server:  # Type check to satisfy linter
-            async with self.server:
-                await self.server.serve_forever()
-        else:
-            raise RuntimeError("Server failed to initialize")
+        # Whatever ends start() - a shutdown request, a failed bind or a
+        # cancellation - the shutdown below runs, so stop() never waits on
+        # a server that isn't serving
+        try:
+            # Create the server
+            self.server = await loop.create_server(
+                self._create_protocol,
+                self.host,
+                self.port,
+                backlog=LISTEN_BACKLOG,
+                reuse_port=self.reuse_port
+            )
+            for sock in self.server.sockets:
+                configure_listening_socket(sock)
+
+            # Started only once bound, so a failed bind leaves no task
+            # behind. No connection is accepted before this runs, as the
+            # loop hasn't been yielded to since create_server() returned.
+            self._clock = CoarseClock(loop)
+            self._clock_task = asyncio.create_task(self._clock.run())
+
+            # Signals only request the shutdown, which is carried out below
+            # exactly once, however many signals arrive
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, self._shutdown_requested.set)
+
+            logger.info("Server started on %s:%s", self.host, self.port)
+
+            # create_server() is already accepting connections, so just wait
+            # for a shutdown request. serve_forever() isn't used: cancelling
+            # it waits for every client to disconnect on Python 3.12+, and
+            # uvloop's Server.close() doesn't end it at all.
+            await self._shutdown_requested.wait()
+        finally:
+            await self._shutdown()
 
     async def stop(self) -> None:
         """
         Stop the server and close all client connections gracefully.
 
-        This method ensures all resources are properly cleaned up.
+        The shutdown itself is carried out by start(); this requests it
+        and waits until it has completed, so it is safe to call several
+        times or concurrently.
         """
-        if not self.is_running:
+        if not self.is_running or not self._shutdown_requested or not self._stopped:
             return
 
-        logger.info("Shutting down server...")
-        self.is_running = False
-
-        # Cancel cleanup task
-        if self.cleanup_task:
-            self.cleanup_task.cancel()
-            with contextlib_suppress(asyncio.CancelledError):
-                await self.cleanup_task
-
-        # Close all client connections
-        close_tasks = []
-        for client in list(self.clients.values()):
-            if client.state == ConnectionState.CONNECTED:
-                close_tasks.append(self._close_client_connection(client.writer))
-
-        if close_tasks:
-            await asyncio.gather(*close_tasks, return_exceptions=True)
+        self._shutdown_requested.set()
+        await self._stopped.wait()
 
-        # Clear the clients dictionary to prevent memory leaks
-        self.clients.clear()
-
-        # Close the server
-        if self.server:
-            self.server.close()
-            await self.server.wait_closed()
-
-        logger.info("Server shutdown complete")
-
-    async def _periodic_cleanup(self) -> None:
+    async def _shutdown(self) -> None:
         """
-        Periodically check for and clean up stale connections.
+        Close all client connections and the listening server.
 
-        This runs as a background task to ensure dead connections
-        don't remain in the clients dictionary.
+        This method ensures all resources are properly cleaned up.
         """
-        while self.is_running:
-            try:
-                # Wait for the next cleanup interval
-                await asyncio.sleep(CLEANUP_INTERVAL)
-
-                # Check for stale connections
-                stale_writers = []
-                time.time()
-
-                for writer, client in list(self.clients.items()):
-                    # Check if connection is stale
-                    if (client.state == ConnectionState.DISCONNECTED or
-                            client.idle_time > self.idle_timeout or
-                            writer.is_closing()):
-                        stale_writers.append(writer)
-
-                # Clean up stale connections
-                for writer in stale_writers:
-                    if writer in self.clients:
-                        addr = self.clients[writer].address
-                        logger.info(f"Cleaning up stale connection from {addr}")
-                        await self._close_client_connection(writer)
-                        del self.clients[writer]
+        logger.info("Shutting down server...")
+        self.is_running = False
 
-                logger.debug(
-                    f"Cleanup complete: removed {len(stale_writers)} stale connections,"
-                    f" {len(self.clients)} active"
-                )
+        # Stop accepting first, so no connection arrives unseen while the
+        # existing ones are closed
+        if self.server:
+            self.server.close()
 
-            except asyncio.CancelledError:
-                # Task was cancelled, exit cleanly
-                break
-            except Exception as e:
-                # Log any errors but keep the cleanup task running
-                logger.error(f"Error in periodic cleanup: {e}")
+        # Close all client connections. Each one leaves the set in
+        # connection_lost(); loop in case one accepted just before the
+        # server closed registered itself while we were waiting.
+        while self._connections:
+            connections = list(self._connections)
+            for connection in connections:
+                connection.close()
+            await asyncio.gather(
+                *(connection.wait_closed() for connection in connections),
+                return_exceptions=True
+            )
+
+        # On Python 3.12+ this also waits for every connection to be gone,
+        # which the loop above has already ensured
+        if self.server:
+            await self.server.wait_closed()
 
-    async def _close_client_connection(self, writer: asyncio.StreamWriter) -> None:
-        """
-        Close a client connection gracefully.
+        if self._clock_task:
+            self._clock_task.cancel()
+            with contextlib_suppress(asyncio.CancelledError):
+                await self._clock_task
 
-        Args:
-            writer: The StreamWriter associated with the client
-        """
-        try:
-            if not writer.is_closing():
-                writer.close()
-                await writer.wait_closed()
-        except Exception as e:
-            # Just log the error, we're trying to clean up anyway
-            logger.error(f"Error closing client connection: {e}")
-        finally:
-            # Update client state if it exists
-            if writer in self.clients:
-                client = self.clients[writer]
-                # Update the state directly, as ClientConnection is mutable
-                client.state = ConnectionState.DISCONNECTED
-
-    async def _handle_client(
-        self,
-        reader: asyncio.StreamReader,
-        writer: asyncio.StreamWriter
-    ) -> None:
-        """
-        Handle a client connection by echoing back messages.
+        logger.info("Server shutdown complete")
+        if self._stopped:
+            self._stopped.set()
 
-        Args:
-            reader: Stream for reading client messages
-            writer: Stream for sending responses
+    def _create_protocol(self) -> EchoProtocol:
         """
-        # Get client info for logging
-        addr = writer.get_extra_info('peername')
-        logger.info(f"New connection from {addr}")
+        Create the protocol instance for a newly accepted connection.
 
-        # Register client
-        self.clients[writer] = ClientConnection(writer=writer, address=addr)
+        Returns:
+            A protocol bound to this server's connections, idle timeout
+            and clock
 
-        try:
-            await self._process_client_messages(reader, writer)
-        except Exception as e:
-            logger.error(f"Unexpected error handling client {addr}: {e}")
-        finally:
-            # Clean up the connection
-            try:
-                await self._close_client_connection(writer)
-                if writer in self.clients:
-                    del self.clients[writer]
-                logger.info(f"Connection from {addr} closed")
-            except Exception as e:
-                logger.error(f"Error during client cleanup for {addr}: {e}")
-                # Force removal from clients dictionary to prevent leaks
-                if writer in self.clients:
-                    del self.clients[writer]
-
-    async def _process_client_messages(
-        self,
-        reader: asyncio.StreamReader,
-        writer: asyncio.StreamWriter
-    ) -> None:
-        """
-        Process messages from a client, handling timeouts and errors.
-
-        Args:
-            reader: Stream for reading client messages
-            writer: Stream for sending responses
+        Raises:
+            RuntimeError: If called before start()
         """
-        addr = writer.get_extra_info('peername')
-
-        while self.is_running:
-            try:
-                # Read data with timeout
-                data = await asyncio.wait_for(
-                    reader.readline(),
-                    timeout=self.idle_timeout
-                )
-
-                if not data:  # Connection closed
-                    break
-
-                # Update last activity timestamp
-                if writer in self.clients:
-                    self.clients[writer].update_activity()
-
-                # Process the message (echo it back)
-                message = data.decode().strip()
-                logger.debug(f"Received: {message} from {addr}")
-
-                # Send response
-                writer.write(f"{message}\n".encode())
-                await writer.drain()
-
-            except asyncio.TimeoutError:
-                logger.info(f"Client {addr} idle timeout")
-                break
-            except ConnectionError as e:
-                logger.info(f"Connection error for {addr}: {e}")
-                break
-            except Exception as e:
-                logger.error(f"Error handling client {addr}: {e}")
-                break
+        if not self._clock:  # Type check to satisfy linter
+            raise RuntimeError("Server clock is not running")
+        return EchoProtocol(self._connections, self.idle_timeout, self._clock)
@@ -0,0 +1,157 @@
+"""
+Tests for the rediminute command line parser.
+
+parse_args() replaces argparse, so these pin down the argparse behaviour
+it mimics: the accepted option forms, the defaults, and the exit status
+and messages of usage errors.
+"""
+from typing import Callable, Iterator, List
+
+import pytest
+
+from rediminute.__main__ import HELP, USAGE, exit_with_usage_error, parse_args
+from rediminute.server import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    DEFAULT_TIMEOUT,
+    DEFAULT_WORKERS,
+)
+
+ArgvSetter = Callable[[List[str]], None]
+
+
+@pytest.fixture
+def set_argv(monkeypatch: pytest.MonkeyPatch) -> Iterator[ArgvSetter]:
+    """
+    Provide a helper that replaces the command line arguments.
+
+    Yields:
+        A callable taking the arguments that follow the program name
+    """
+    def set_arguments(arguments: List[str]) -> None:
+        monkeypatch.setattr("sys.argv", ["rediminute", *arguments])
+
+    yield set_arguments
+
+
+def assert_usage_error(
+    capsys: "pytest.CaptureFixture[str]",
+    exc_info: "pytest.ExceptionInfo[SystemExit]",
+    message: str,
+) -> None:
+    """
+    Check that parsing failed with argparse's exit status and message.
+
+    Args:
+        capsys: Fixture capturing the output of the failed parse
+        exc_info: The SystemExit raised by the parser
+        message: Expected error message after "rediminute: error: "
+    """
+    assert exc_info.value.code == 2
+    assert capsys.readouterr().err == f"{USAGE}\nrediminute: error: {message}\n"
+
+
+def test_defaults_without_arguments(set_argv: ArgvSetter) -> None:
+    set_argv([])
+
+    args = parse_args()
+
+    assert args.host == DEFAULT_HOST
+    assert args.port == DEFAULT_PORT
+    assert args.timeout == DEFAULT_TIMEOUT
+    assert args.workers == DEFAULT_WORKERS
+    assert args.debug is False
+
+
+def test_accepts_separate_values(set_argv: ArgvSetter) -> None:
+    set_argv(["--host", "127.0.0.1", "--port", "9000", "--timeout", "5",
+              "--workers", "3", "--debug"])
+
+    args = parse_args()
+
+    assert (args.host, args.port, args.timeout, args.workers, args.debug) == (
+        "127.0.0.1", 9000, 5, 3, True
+    )
+
+
+def test_accepts_equals_values(set_argv: ArgvSetter) -> None:
+    set_argv(["--host=::1", "--port=9000", "--timeout=5", "--workers=2"])
+
+    args = parse_args()
+
+    assert (args.host, args.port, args.timeout, args.workers) == ("::1", 9000, 5, 2)
+
+
+def test_last_repeated_option_wins(set_argv: ArgvSetter) -> None:
+    set_argv(["--port", "9000", "--port=9001"])
+
+    assert parse_args().port == 9001
+
+
+@pytest.mark.parametrize("flag", ["-h", "--help"])
+def test_help_exits_successfully(
+    set_argv: ArgvSetter, capsys: "pytest.CaptureFixture[str]", flag: str
+) -> None:
+    set_argv(["--port", "9000", flag, "--bogus"])
+
+    with pytest.raises(SystemExit) as exc_info:
+        parse_args()
+
+    assert exc_info.value.code == 0
+    assert capsys.readouterr().out == f"{HELP}\n"
+
+
+def test_rejects_unknown_argument(
+    set_argv: ArgvSetter, capsys: "pytest.CaptureFixture[str]"
+) -> None:
+    set_argv(["--verbose"])
+
+    with pytest.raises(SystemExit) as exc_info:
+        parse_args()
+
+    assert_usage_error(capsys, exc_info, "unrecognized arguments: --verbose")
+
+
+def test_rejects_missing_value(
+    set_argv: ArgvSetter, capsys: "pytest.CaptureFixture[str]"
+) -> None:
+    set_argv(["--port"])
+
+    with pytest.raises(SystemExit) as exc_info:
+        parse_args()
+
+    assert_usage_error(capsys, exc_info, "argument --port: expected one argument")
+
+
+@pytest.mark.parametrize("arguments", [["--port", "http"], ["--port=http"]])
+def test_rejects_non_integer_value(
+    set_argv: ArgvSetter,
+    capsys: "pytest.CaptureFixture[str]",
+    arguments: List[str],
+) -> None:
+    set_argv(arguments)
+
+    with pytest.raises(SystemExit) as exc_info:
+        parse_args()
+
+    assert_usage_error(capsys, exc_info, "argument --port: invalid value: 'http'")
+
+
+@pytest.mark.parametrize("workers", ["0", "-1"])
+def test_rejects_fewer_than_one_worker(
+    set_argv: ArgvSetter, capsys: "pytest.CaptureFixture[str]", workers: str
+) -> None:
+    set_argv(["--workers", workers])
+
+    with pytest.raises(SystemExit) as exc_info:
+        parse_args()
+
+    assert_usage_error(capsys, exc_info, "argument --workers: must be at least 1")
+
+
+def test_usage_error_prints_full_usage(capsys: "pytest.CaptureFixture[str]") -> None:
+    with pytest.raises(SystemExit) as exc_info:
+        exit_with_usage_error("something is wrong")
+
+    assert len(USAGE.splitlines()) == 2
+    assert_usage_error(capsys, exc_info, "something is wrong")
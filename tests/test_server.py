@@ -0,0 +1,293 @@
+"""
+Tests for the rediminute echo server.
+
+Every test talks to a real server over a loopback socket, so the
+BufferedProtocol line handling, the idle timer and the shutdown paths
+are exercised the way clients see them.
+"""
+import asyncio
+import socket
+from typing import AsyncIterator, Awaitable, Callable, List, Tuple
+
+import pytest
+import pytest_asyncio
+
+from rediminute.server import (
+    DEFAULT_TIMEOUT,
+    RECEIVE_BUFFER_SIZE,
+    CoarseClock,
+    RediminuteServer,
+    configure_client_socket,
+)
+
+HOST = "127.0.0.1"
+SHUTDOWN_TIMEOUT = 2
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+ServerFactory = Callable[..., Awaitable[Tuple[RediminuteServer, int]]]
+
+
+@pytest_asyncio.fixture
+async def start_server() -> AsyncIterator[ServerFactory]:
+    """
+    Provide a factory that starts servers on free ports.
+
+    Every server started through the factory is stopped when the test
+    ends, whatever the test left behind.
+
+    Yields:
+        An async callable taking an optional idle timeout and returning
+        the running server and the port it listens on
+    """
+    running: List[Tuple[RediminuteServer, asyncio.Task[None]]] = []
+
+    async def start(
+        idle_timeout: int = DEFAULT_TIMEOUT,
+    ) -> Tuple[RediminuteServer, int]:
+        server = RediminuteServer(host=HOST, port=0, idle_timeout=idle_timeout)
+        task = asyncio.create_task(server.start())
+        running.append((server, task))
+        return server, await wait_until_listening(server, task)
+
+    yield start
+
+    for server, task in running:
+        await asyncio.wait_for(server.stop(), SHUTDOWN_TIMEOUT)
+        if not task.done():
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def wait_until_listening(
+    server: RediminuteServer, task: "asyncio.Task[None]"
+) -> int:
+    """
+    Wait until a server started in a task accepts connections.
+
+    Args:
+        server: Server whose start() runs in the task
+        task: Task running server.start()
+
+    Returns:
+        Port the server listens on
+
+    Raises:
+        OSError: If start() failed to bind
+    """
+    while server.server is None:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    return server.server.sockets[0].getsockname()[1]
+
+
+async def connect(port: int) -> Connection:
+    """
+    Open a client connection with a read limit above the receive buffer.
+
+    Args:
+        port: Port the server listens on
+
+    Returns:
+        The reader and writer of the new connection
+    """
+    return await asyncio.open_connection(HOST, port, limit=4 * RECEIVE_BUFFER_SIZE)
+
+
+async def read_until_closed(reader: asyncio.StreamReader) -> bytes:
+    """
+    Read everything the server sends until it closes the connection.
+
+    Args:
+        reader: Reader of the client connection
+
+    Returns:
+        All bytes received before EOF
+    """
+    return await asyncio.wait_for(reader.read(), SHUTDOWN_TIMEOUT)
+
+
+@pytest.mark.asyncio
+async def test_echoes_line(start_server: ServerFactory) -> None:
+    _, port = await start_server()
+    reader, writer = await connect(port)
+
+    writer.write(b"hello\n")
+
+    assert await reader.readline() == b"hello\n"
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_echoes_line_split_across_reads(start_server: ServerFactory) -> None:
+    _, port = await start_server()
+    reader, writer = await connect(port)
+
+    writer.write(b"hel")
+    await writer.drain()
+    await asyncio.sleep(0.05)
+    writer.write(b"lo\n")
+
+    assert await reader.readline() == b"hello\n"
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_echoes_several_lines_in_one_read(start_server: ServerFactory) -> None:
+    _, port = await start_server()
+    reader, writer = await connect(port)
+
+    writer.write(b"one\ntwo\r\nthree\n")
+
+    assert await reader.readexactly(15) == b"one\ntwo\r\nthree\n"
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_echoes_unterminated_line_at_eof(start_server: ServerFactory) -> None:
+    _, port = await start_server()
+    reader, writer = await connect(port)
+
+    writer.write(b"first\ntail")
+    writer.write_eof()
+
+    assert await read_until_closed(reader) == b"first\ntail\n"
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_echoes_line_filling_receive_buffer(start_server: ServerFactory) -> None:
+    _, port = await start_server()
+    reader, writer = await connect(port)
+    line = b"x" * (RECEIVE_BUFFER_SIZE - 1) + b"\n"
+
+    writer.write(line)
+
+    assert await reader.readexactly(len(line)) == line
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_closes_connection_on_overlong_line(start_server: ServerFactory) -> None:
+    _, port = await start_server()
+    reader, writer = await connect(port)
+
+    writer.write(b"x" * RECEIVE_BUFFER_SIZE)
+
+    assert await read_until_closed(reader) == b""
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_echoes_non_utf8_bytes(start_server: ServerFactory) -> None:
+    _, port = await start_server()
+    reader, writer = await connect(port)
+
+    writer.write(b"\xff\xfe\x00\x80\n")
+
+    assert await reader.readline() == b"\xff\xfe\x00\x80\n"
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_closes_idle_connection(start_server: ServerFactory) -> None:
+    _, port = await start_server(idle_timeout=1)
+    reader, writer = await connect(port)
+    loop = asyncio.get_running_loop()
+    connected_at = loop.time()
+
+    assert await asyncio.wait_for(reader.read(), 3) == b""
+    assert loop.time() - connected_at >= 0.9
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_activity_postpones_idle_timeout(start_server: ServerFactory) -> None:
+    _, port = await start_server(idle_timeout=1)
+    reader, writer = await connect(port)
+
+    for _ in range(3):
+        await asyncio.sleep(0.6)
+        writer.write(b"ping\n")
+        assert await reader.readline() == b"ping\n"
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_stop_closes_connected_clients(start_server: ServerFactory) -> None:
+    server, port = await start_server()
+    reader, writer = await connect(port)
+    writer.write(b"hello\n")
+    await reader.readline()
+
+    await asyncio.wait_for(server.stop(), SHUTDOWN_TIMEOUT)
+
+    assert not server.is_running
+    assert await read_until_closed(reader) == b""
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_stop_can_be_called_concurrently(start_server: ServerFactory) -> None:
+    server, port = await start_server()
+    _, writer = await connect(port)
+
+    await asyncio.wait_for(
+        asyncio.gather(server.stop(), server.stop()), SHUTDOWN_TIMEOUT
+    )
+
+    assert not server.is_running
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_stop_after_cancelled_start() -> None:
+    server = RediminuteServer(host=HOST, port=0)
+    start_task = asyncio.create_task(server.start())
+    reader, writer = await connect(await wait_until_listening(server, start_task))
+
+    start_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(start_task, SHUTDOWN_TIMEOUT)
+    await asyncio.wait_for(server.stop(), SHUTDOWN_TIMEOUT)
+
+    assert not server.is_running
+    assert await read_until_closed(reader) == b""
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_bind_leaves_nothing_running() -> None:
+    with socket.socket() as blocker:
+        blocker.bind((HOST, 0))
+        blocker.listen()
+        server = RediminuteServer(host=HOST, port=blocker.getsockname()[1])
+
+        with pytest.raises(OSError):
+            await server.start()
+    await asyncio.wait_for(server.stop(), SHUTDOWN_TIMEOUT)
+
+    assert not server.is_running
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_coarse_clock_follows_loop_time() -> None:
+    loop = asyncio.get_running_loop()
+    clock = CoarseClock(loop)
+    started_at = clock.now
+    task = asyncio.create_task(clock.run())
+
+    await asyncio.sleep(0.35)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert 0.2 <= clock.now - started_at <= loop.time() - started_at
+
+
+def test_configure_client_socket_disables_nagle() -> None:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        configure_client_socket(sock)
+
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)